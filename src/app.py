@@ -22,8 +22,10 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import hashlib
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 
@@ -38,11 +40,110 @@ from utils import (
     setup_logging, validate_story_input, get_session_state, 
     clear_session_state, format_error_message, create_download_link
 )
-from llm_handler import LLMHandler
+from llm_handler import LLMHandler, LLMGenerationError
 from image_generator import ImageGenerator
 from local_image_generator import LocalImageGenerator
 
 
+class PanelGenerationError(RuntimeError):
+    """Raised when the image API fails to produce a panel."""
+
+
+@st.cache_resource(show_spinner=False)
+def _get_local_generator() -> LocalImageGenerator:
+    """
+    Construct the local generator once per server process.
+
+    Streamlit reruns the whole script on every widget interaction, and the
+    constructor may load a multi-GB diffusion model - cache_resource makes
+    that a one-time cost instead of a per-rerun one.
+    """
+    return LocalImageGenerator()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_image_generator(api_url: str, api_key: str) -> ImageGenerator:
+    """
+    Construct the API generator once per (api_url, api_key).
+
+    Keeps its pooled requests.Session alive across Streamlit reruns so
+    keep-alive connections survive widget interactions.
+    """
+    return ImageGenerator(api_url, api_key)
+
+
+def _encode_png(image: Image.Image) -> bytes:
+    """
+    Encode an image as PNG bytes at a fast compression level.
+
+    compress_level=1 is ~3-5x faster than Pillow's default of 6 for a
+    modest size increase - the right trade-off for interactive downloads.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=1, optimize=False)
+    return buffer.getvalue()
+
+
+def _encode_preview(image: Image.Image, max_size: int = 256) -> bytes:
+    """
+    Encode a downsized preview for on-screen display.
+
+    The browser shows panels well under full resolution, so ship a
+    thumbnail and keep the original bytes for downloads only.
+    """
+    preview = image.copy()
+    preview.thumbnail((max_size, max_size))
+    return _encode_png(preview)
+
+
+@st.cache_data(show_spinner=False, max_entries=128, ttl=3600)
+def _generate_panel_png(generator_key: str, prompt: str, style: str,
+                        width: int, height: int, _generator) -> bytes:
+    """
+    Generate one panel and return it as PNG bytes, cached by prompt.
+
+    Keyed on (generator_key, prompt, style, width, height) so a rerun that
+    changes a single prompt only regenerates that panel. The generator
+    itself is excluded from the key via the underscore prefix; generator_key
+    carries a hash of its configuration instead of the raw API key.
+
+    Raises:
+        PanelGenerationError: If the API returned no image. Raising keeps
+            the failure out of the cache, so the next rerun retries
+            instead of serving a stale miss for the TTL window.
+    """
+    image = _generator.generate_image(prompt, style, width, height)
+    if image is None:
+        raise PanelGenerationError(f"Image API returned no image for: {prompt[:50]}")
+    return _encode_png(image)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _cached_panel_descriptions(model: str, story_hash: bytes,
+                               num_panels: int, _story_text: str) -> List[str]:
+    """
+    Generate panel descriptions, cached by (model, story hash, panel count).
+
+    Style or layout tweaks rerun generate_comic but should not re-invoke
+    the LLM. The full story text is passed with an underscore prefix so it
+    stays out of the cache key; the compact blake2b digest stands in for it.
+
+    Raises:
+        LLMGenerationError: If the LLM is unavailable or fails. Raising
+            keeps degraded word-split descriptions out of the cache, so
+            the story gets real descriptions once the service recovers.
+    """
+    return LLMHandler(model_name=model).generate_panel_descriptions(
+        _story_text, num_panels, allow_fallback=False
+    )
+
+
+def _api_generator_key(api_url: str, api_key: str) -> str:
+    """Build a cache key for an API generator without leaking the key."""
+    key_hash = hashlib.blake2b((api_key or "").encode(), digest_size=8).hexdigest()
+    return f"api|{api_url}|{key_hash}"
+
+
 def main():
     """
     Main Streamlit application for ComicAI.
@@ -193,7 +294,7 @@ def main():
             
             # Display panel count
             st.metric("Panels Created", len(session_data["panels"]))
-            st.metric("Images Generated", len(session_data["images"]))
+            st.metric("Images Generated", len(session_data["image_bytes"]))
             
             # Show generation time if available
             if "generation_time" in session_data:
@@ -202,31 +303,40 @@ def main():
             st.info("💡 Enter your story and click 'Generate Comic' to get started!")
     
     # Display generated comic
-    if session_data["generated"] and session_data["images"]:
+    if session_data["generated"] and session_data["image_bytes"]:
         st.header("🎨 Your Comic")
         
         # Display individual panels
         st.subheader("Individual Panels")
-        cols = st.columns(min(len(session_data["images"]), 4))
+        cols = st.columns(min(len(session_data["image_bytes"]), 4))
         
-        for i, (image, panel_text) in enumerate(zip(session_data["images"], session_data["panels"])):
+        # Pass the already-encoded preview bytes so Streamlit serves them
+        # verbatim instead of re-encoding each PIL image per rerun; full
+        # resolution bytes are kept for the download paths
+        for i, (image_data, panel_text) in enumerate(zip(session_data["preview_bytes"], session_data["panels"])):
             col_idx = i % len(cols)
             with cols[col_idx]:
-                st.image(image, caption=f"Panel {i+1}: {panel_text[:50]}...", use_column_width=True)
+                st.image(image_data, caption=f"Panel {i+1}: {panel_text[:50]}...", use_column_width=True)
         
         # Display combined comic
         st.subheader("Combined Comic Strip")
         
-        # Create combined image
-        local_generator = LocalImageGenerator()
+        # Create combined image. Session state only holds PNG bytes, so
+        # decode each panel once here, right before the blit needs pixels.
+        panel_images = [
+            Image.open(io.BytesIO(image_data)).convert("RGB")
+            for image_data in session_data["image_bytes"]
+        ]
+
+        local_generator = _get_local_generator()
         if local_generator.is_available():
             combined_image = local_generator.combine_panels_into_comic(
-                session_data["images"], layout_style
+                panel_images, layout_style
             )
         else:
-            image_generator = ImageGenerator(api_url, api_key)
+            image_generator = _get_image_generator(api_url, api_key)
             combined_image = image_generator.combine_panels_into_comic(
-                session_data["images"], layout_style
+                panel_images, layout_style
             )
         
         st.image(combined_image, caption="Your complete comic strip!", use_column_width=True)
@@ -238,10 +348,8 @@ def main():
         
         with col1:
             # Download combined comic
-            img_buffer = io.BytesIO()
-            combined_image.save(img_buffer, format="PNG")
-            img_data = img_buffer.getvalue()
-            
+            img_data = _encode_png(combined_image)
+
             st.download_button(
                 label="📥 Download Combined Comic",
                 data=img_data,
@@ -258,10 +366,8 @@ def main():
                 zip_buffer = io.BytesIO()
                 
                 with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-                    for i, (image, panel_text) in enumerate(zip(session_data["images"], session_data["panels"])):
-                        img_buffer = io.BytesIO()
-                        image.save(img_buffer, format="PNG")
-                        zip_file.writestr(f"panel_{i+1}.png", img_buffer.getvalue())
+                    for i, image_data in enumerate(session_data["image_bytes"]):
+                        zip_file.writestr(f"panel_{i+1}.png", image_data)
                 
                 st.download_button(
                     label="📦 Download ZIP",
@@ -313,43 +419,60 @@ def generate_comic(story_text: str, art_style: str, num_panels: int,
         status_text.text("🤖 Generating panel descriptions...")
         progress_bar.progress(20)
         
-        llm_handler = LLMHandler(model_name=llm_model)
-        panel_descriptions = llm_handler.generate_panel_descriptions(story_text, num_panels)
+        story_hash = hashlib.blake2b(story_text.encode(), digest_size=16).digest()
+        try:
+            panel_descriptions = _cached_panel_descriptions(
+                llm_model, story_hash, num_panels, story_text
+            )
+        except LLMGenerationError:
+            # Uncached fallback: the word-split descriptions are served
+            # for this run only, not pinned for the cache TTL
+            panel_descriptions = LLMHandler(model_name=llm_model).generate_panel_descriptions(
+                story_text, num_panels
+            )
         
         # Step 2: Generate images for each panel
         status_text.text("🎨 Generating images...")
         progress_bar.progress(40)
         
         # Try local generation first, fallback to API if available
-        local_generator = LocalImageGenerator()
+        local_generator = _get_local_generator()
         if local_generator.is_available():
             st.info("🎨 Using local Stable Diffusion for image generation (no API needed!)")
             images = local_generator.generate_comic_panels(panel_descriptions, art_style)
         elif api_url:
             st.info("🌐 Using API for image generation")
-            image_generator = ImageGenerator(api_url, api_key)
-            images = image_generator.generate_comic_panels(panel_descriptions, art_style)
+            image_generator = _get_image_generator(api_url, api_key)
+            generator_key = _api_generator_key(api_url, api_key)
+            prompts = [f"Comic panel {i+1}: {description}"
+                       for i, description in enumerate(panel_descriptions)]
+
+            def _panel_image(prompt: str) -> Image.Image:
+                try:
+                    panel_png = _generate_panel_png(
+                        generator_key, prompt, art_style, 512, 512, image_generator
+                    )
+                    return Image.open(io.BytesIO(panel_png))
+                except PanelGenerationError:
+                    # One failed panel becomes a placeholder, as in the
+                    # batch path, instead of aborting the whole comic
+                    return image_generator._create_placeholder_image(prompt)
+
+            # Cache misses are pure I/O, so issue them concurrently like
+            # generate_comic_panels does; hits return from the cache
+            # immediately and executor.map keeps panel order
+            with ThreadPoolExecutor(max_workers=min(len(prompts), 6)) as executor:
+                images = list(executor.map(_panel_image, prompts))
         else:
             st.warning("⚠️ No image generation available. Using placeholders.")
             # Create placeholder images
-            from PIL import Image, ImageDraw, ImageFont
-            images = []
-            for i, description in enumerate(panel_descriptions):
-                img = Image.new('RGB', (512, 512), color='#f0f0f0')
-                draw = ImageDraw.Draw(img)
-                try:
-                    font = ImageFont.load_default()
-                except:
-                    font = None
-                text = f"Panel {i+1}: {description[:30]}..."
-                bbox = draw.textbbox((0, 0), text, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                x = (512 - text_width) // 2
-                y = (512 - text_height) // 2
-                draw.text((x, y), text, fill='#666666', font=font)
-                draw.rectangle([0, 0, 511, 511], outline='#cccccc', width=2)
-                images.append(img)
+            placeholder_generator = _get_image_generator(api_url, api_key)
+            images = [
+                placeholder_generator._create_placeholder_image(
+                    description, text=f"Panel {i+1}: {description[:30]}..."
+                )
+                for i, description in enumerate(panel_descriptions)
+            ]
         
         # Step 3: Update session state
         status_text.text("💾 Saving results...")
@@ -357,7 +480,10 @@ def generate_comic(story_text: str, art_style: str, num_panels: int,
         
         session_data["story"] = story_text
         session_data["panels"] = panel_descriptions
-        session_data["images"] = images
+        # Session state keeps PNG bytes, not decoded images: roughly 4x less
+        # memory per panel, and Streamlit never deep-copies pixel buffers
+        session_data["image_bytes"] = [_encode_png(image) for image in images]
+        session_data["preview_bytes"] = [_encode_preview(image) for image in images]
         session_data["generated"] = True
         session_data["generation_time"] = time.time() - start_time
         
@@ -22,14 +22,50 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
+import hashlib
 import os
 import json
+import re
 from typing import List, Dict, Optional, Tuple
 import requests
 import time
 
 from loguru import logger
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    logger.warning("aiohttp not available. Batched LLM requests will run sequentially. Install with: pip install aiohttp")
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+    logger.warning("diskcache not available. LLM responses will not be cached. Install with: pip install diskcache")
+
+# Where cached LLM responses live, and for how long
+_LLM_CACHE_DIR = os.path.expanduser("~/.comicai/llm_cache")
+_LLM_CACHE_TTL = 7 * 86400
+
+# Matches "Panel 3: description" lines, tolerating extra whitespace and
+# "Panel 3 - description" variants the old line-by-line parser missed
+_PANEL_RE = re.compile(r'(?m)^\s*Panel\s*\d+\s*[:\-]\s*(.+?)\s*$')
+
+
+class LLMGenerationError(RuntimeError):
+    """Raised when the LLM cannot produce panel descriptions and the
+    caller opted out of the word-split fallback."""
+
 
 class LLMHandler:
     """
@@ -47,47 +83,131 @@ class LLMHandler:
         self.model_name = model_name
         self.base_url = base_url
         self.api_url = f"{base_url}/api/generate"
-        
-    def is_service_available(self) -> bool:
+
+        # Constant instruction prefix, sent through Ollama's "system"
+        # field so the server can reuse its KV-cache for the prefix
+        # across calls instead of re-processing it every time
+        self.system_prompt = (
+            "You are a comic book artist. Break down the story you are given "
+            "into the requested number of comic panels. Each panel should be "
+            "a clear, visual scene that can be illustrated. Make each "
+            "description visual and specific enough for an artist to draw, "
+            "and keep each description under 50 words. Respond with one "
+            "panel per line in the form \"Panel X: [description]\"."
+        )
+
+        self._models = None
+        self._models_ts = None
+        self._avail = False
+        self._avail_ts = None
+
+        # One keep-alive session so repeated calls reuse the socket to
+        # Ollama instead of opening a fresh TCP connection each time
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Persistent response cache: a hit skips the HTTP call entirely
+        # and survives restarts
+        self.cache = None
+        if DISKCACHE_AVAILABLE:
+            try:
+                self.cache = diskcache.Cache(_LLM_CACHE_DIR)
+            except Exception as e:
+                logger.warning(f"Could not open LLM cache: {e}")
+
+    def _cache_key(self, prompt: str) -> str:
         """
-        Check if the LLM service is available.
-        
+        Build a stable cache key for a prompt.
+
+        Args:
+            prompt: The prompt being sent
+
         Returns:
-            True if service is available, False otherwise
+            Hex digest covering model, prompt, and generation options
         """
+        options = json.dumps(self._build_payload(prompt)["options"], sort_keys=True)
+        return hashlib.sha256(
+            f"{self.model_name}|{self.system_prompt}|{prompt}|{options}".encode()
+        ).hexdigest()
+
+    def _refresh_tags(self) -> None:
+        """
+        Fetch /api/tags once, updating both the availability flag and the
+        model-list memo so neither consumer needs its own round-trip.
+        """
+        now = time.monotonic()
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
+            self._avail = response.status_code == 200
+            if self._avail:
+                if ORJSON_AVAILABLE:
+                    data = orjson.loads(response.content)
+                else:
+                    data = json.loads(response.content)
+                self._models = [model["name"] for model in data.get("models", [])]
+                self._models_ts = now
         except Exception as e:
             logger.warning(f"LLM service not available: {e}")
-            return False
+            self._avail = False
+        self._avail_ts = now
+
+    def is_service_available(self) -> bool:
+        """
+        Check if the LLM service is available.
+
+        The answer is memoized for a short window so the preflight check in
+        generate_panel_descriptions doesn't add a round-trip to every call.
+
+        Returns:
+            True if service is available, False otherwise
+        """
+        if self._avail_ts is not None and time.monotonic() - self._avail_ts < 10:
+            return self._avail
+        self._refresh_tags()
+        return self._avail
     
-    def generate_panel_descriptions(self, story: str, num_panels: int = 4) -> List[str]:
+    def generate_panel_descriptions(self, story: str, num_panels: int = 4,
+                                    use_cache: bool = True,
+                                    allow_fallback: bool = True) -> List[str]:
         """
         Generate panel descriptions from a story using the local LLM.
-        
+
         Args:
             story: The complete story text
             num_panels: Number of panels to generate
-            
+            use_cache: Whether to serve/store cached LLM responses
+            allow_fallback: Substitute word-split descriptions when the
+                LLM is unavailable or fails; pass False to raise instead,
+                so callers that cache results don't cache degraded output
+
         Returns:
             List of panel descriptions
+
+        Raises:
+            LLMGenerationError: If the LLM produced nothing and
+                allow_fallback is False
         """
         if not self.is_service_available():
+            if not allow_fallback:
+                raise LLMGenerationError("LLM service not available")
             logger.warning("LLM service not available, using fallback method")
             return self._fallback_panel_generation(story, num_panels)
-        
+
         prompt = self._create_panel_prompt(story, num_panels)
-        
+
         try:
-            response = self._call_llm_api(prompt)
-            if response:
-                return self._parse_panel_response(response, num_panels)
-            else:
-                return self._fallback_panel_generation(story, num_panels)
+            response = self._call_llm_api(prompt, use_cache=use_cache)
         except Exception as e:
             logger.error(f"Error generating panels with LLM: {e}")
-            return self._fallback_panel_generation(story, num_panels)
+            response = None
+
+        if response:
+            return self._parse_panel_response(response, num_panels)
+        if not allow_fallback:
+            raise LLMGenerationError("LLM returned no panel descriptions")
+        return self._fallback_panel_generation(story, num_panels)
     
     def _create_panel_prompt(self, story: str, num_panels: int) -> str:
         """
@@ -100,59 +220,174 @@ class LLMHandler:
         Returns:
             Formatted prompt for the LLM
         """
-        prompt = f"""
-        You are a comic book artist. Break down the following story into {num_panels} comic panels.
-        Each panel should be a clear, visual scene that can be illustrated.
-        
-        Story: {story}
-        
-        Please provide {num_panels} panel descriptions, each on a new line starting with "Panel X:".
-        Make each description visual and specific enough for an artist to draw.
-        Keep each description under 50 words.
-        
-        Format your response as:
-        Panel 1: [description]
-        Panel 2: [description]
-        ...
-        Panel {num_panels}: [description]
-        """
-        return prompt.strip()
+        # The standing instructions live in self.system_prompt; only the
+        # story and the panel count vary per call
+        prompt = (
+            f"Story: {story}\n\n"
+            f"Provide exactly {num_panels} panel descriptions, "
+            f"Panel 1 through Panel {num_panels}."
+        )
+        return prompt
     
-    def _call_llm_api(self, prompt: str) -> Optional[str]:
+    def generate_panels_batch(self, stories: List[str], num_panels: int = 4) -> List[List[str]]:
         """
-        Call the local LLM API.
-        
+        Generate panel descriptions for several stories concurrently.
+
+        Issues all prompts to the LLM at once so wall time is roughly one
+        round-trip instead of one per story. Falls back to sequential
+        generation when aiohttp or the service is unavailable.
+
+        Args:
+            stories: List of story texts
+            num_panels: Number of panels to generate per story
+
+        Returns:
+            List of panel-description lists, one per story
+        """
+        if not stories:
+            return []
+
+        if not AIOHTTP_AVAILABLE or not self.is_service_available():
+            return [self.generate_panel_descriptions(story, num_panels)
+                    for story in stories]
+
+        prompts = [self._create_panel_prompt(story, num_panels) for story in stories]
+
+        try:
+            responses = asyncio.run(self._abatch(prompts))
+        except Exception as e:
+            logger.error(f"Error in batched LLM generation: {e}")
+            responses = [None] * len(stories)
+
+        results = []
+        for story, response in zip(stories, responses):
+            if response:
+                results.append(self._parse_panel_response(response, num_panels))
+            else:
+                results.append(self._fallback_panel_generation(story, num_panels))
+        return results
+
+    def _build_payload(self, prompt: str) -> Dict:
+        """
+        Build the request payload for the Ollama generate endpoint.
+
         Args:
             prompt: The prompt to send to the LLM
-            
+
         Returns:
-            The LLM response text, or None if failed
+            JSON-serializable payload dict
         """
-        payload = {
+        return {
             "model": self.model_name,
+            "system": self.system_prompt,
             "prompt": prompt,
             "stream": False,
             "options": {
                 "temperature": 0.7,
                 "top_p": 0.9,
-                "max_tokens": 500
+                "max_tokens": 500,
+                # Pin roughly the system-prompt tokens in Ollama's KV
+                # cache between calls (~4 chars per token)
+                "num_keep": len(self.system_prompt) // 4
             }
         }
-        
+
+    async def _abatch(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        Fan prompts out to the LLM concurrently over one client session.
+
+        Args:
+            prompts: Prompts to send
+
+        Returns:
+            List of response texts (None entries for failed calls)
+        """
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(
+                *[self._call_llm_api_async(session, prompt) for prompt in prompts]
+            )
+
+    async def _call_llm_api_async(self, session, prompt: str) -> Optional[str]:
+        """
+        Call the local LLM API asynchronously.
+
+        Args:
+            session: Shared aiohttp client session
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response text, or None if failed
+        """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
         try:
-            response = requests.post(
+            async with session.post(
+                self.api_url,
+                json=self._build_payload(prompt),
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    text = result.get("response", "")
+                    if key is not None and text:
+                        self.cache.set(key, text, expire=_LLM_CACHE_TTL)
+                    return text
+                logger.error(f"LLM API error: {response.status}")
+                return None
+        except asyncio.TimeoutError:
+            logger.error("LLM API request timed out")
+            return None
+        except Exception as e:
+            logger.error(f"Error calling LLM API: {e}")
+            return None
+
+    def _call_llm_api(self, prompt: str, use_cache: bool = True) -> Optional[str]:
+        """
+        Call the local LLM API.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            use_cache: Whether to serve/store cached responses
+
+        Returns:
+            The LLM response text, or None if failed
+        """
+        key = None
+        if use_cache and self.cache is not None:
+            key = self._cache_key(prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        payload = self._build_payload(prompt)
+
+        try:
+            response = self.session.post(
                 self.api_url,
                 json=payload,
                 timeout=30
             )
-            
+
             if response.status_code == 200:
-                result = response.json()
-                return result.get("response", "")
+                # orjson decodes straight from the response bytes, skipping
+                # stdlib json's pure-Python tokenizer
+                if ORJSON_AVAILABLE:
+                    result = orjson.loads(response.content)
+                else:
+                    result = json.loads(response.content)
+                text = result.get("response", "")
+                if key is not None and text:
+                    self.cache.set(key, text, expire=_LLM_CACHE_TTL)
+                return text
             else:
                 logger.error(f"LLM API error: {response.status_code}")
                 return None
-                
+
         except requests.exceptions.Timeout:
             logger.error("LLM API request timed out")
             return None
@@ -171,17 +406,10 @@ class LLMHandler:
         Returns:
             List of panel descriptions
         """
-        lines = response.strip().split('\n')
-        panels = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Panel') and ':' in line:
-                # Extract description after the colon
-                description = line.split(':', 1)[1].strip()
-                if description:
-                    panels.append(description)
-        
+        # One pass of the compiled matcher over the whole response instead
+        # of per-line startswith/split scans
+        panels = _PANEL_RE.findall(response)
+
         # If we didn't get enough panels, pad with fallback
         if len(panels) < num_panels:
             logger.warning(f"Only got {len(panels)} panels from LLM, using fallback for missing ones")
@@ -201,21 +429,16 @@ class LLMHandler:
         Returns:
             List of panel descriptions
         """
-        # Simple word-based splitting as fallback
-        words = story.split()
-        words_per_panel = len(words) // num_panels
-        
+        # Simple word-based splitting as fallback, with remainder words
+        # spread evenly across panels
+        from utils import split_text_evenly
+
         panels = []
-        for i in range(num_panels):
-            start_idx = i * words_per_panel
-            end_idx = start_idx + words_per_panel if i < num_panels - 1 else len(words)
-            panel_words = words[start_idx:end_idx]
-            panel_text = " ".join(panel_words)
-            
+        for i, panel_text in enumerate(split_text_evenly(story, num_panels)):
             # Create a more descriptive panel name
             panel_desc = f"Scene {i+1}: {panel_text[:30]}{'...' if len(panel_text) > 30 else ''}"
             panels.append(panel_desc)
-        
+
         return panels
     
     def enhance_panel_description(self, panel_desc: str, style: str = "comic") -> str:
@@ -246,13 +469,9 @@ class LLMHandler:
         Returns:
             List of available model names
         """
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                return [model["name"] for model in data.get("models", [])]
-            else:
-                return []
-        except Exception as e:
-            logger.error(f"Error getting available models: {e}")
-            return [] 
\ No newline at end of file
+        # Short-lived memo so repeated UI polls don't re-hit /api/tags
+        if self._models is not None and time.monotonic() - self._models_ts < 60:
+            return self._models
+
+        self._refresh_tags()
+        return self._models or [] 
\ No newline at end of file
@@ -23,93 +23,98 @@ SOFTWARE.
 """
 
 import pytest
-import sys
-from pathlib import Path
 
-# Add src directory to path for imports
-sys.path.append(str(Path(__file__).parent.parent / "src"))
+# Everything here is a pure-function check with no shared mutable state,
+# so under pytest-xdist (-n auto --dist=loadgroup) the whole module can
+# fan out safely as one group
+pytestmark = [pytest.mark.xdist_group(name="utils_pure")]
 
-from utils import (
-    validate_story_input, split_story_into_panels, 
-    create_image_prompt, format_error_message
-)
+# Built once at import so each test references an existing string
+# instead of re-allocating it per run
+_VALID_STORY = "A cat discovers a magical garden and meets talking flowers."
+_LONG_STORY = "A" * 1001
+_PANEL_STORY = "This is a test story with multiple words to split into panels."
+
+# Exception singletons for the error-formatting sweep; constructed once
+# at import instead of per parametrized call
+_CONN_ERR = ConnectionError("Connection failed")
+_VAL_ERR = ValueError("Invalid input")
+_RT_ERR = RuntimeError("Unknown error")
 
 
 class TestUtils:
     """Test cases for utility functions."""
     
-    def test_validate_story_input_valid(self):
-        """Test valid story input validation."""
-        story = "A cat discovers a magical garden and meets talking flowers."
-        is_valid, error_msg = validate_story_input(story)
-        assert is_valid is True
-        assert error_msg == ""
-    
-    def test_validate_story_input_empty(self):
-        """Test empty story input validation."""
-        story = ""
-        is_valid, error_msg = validate_story_input(story)
-        assert is_valid is False
-        assert "Please enter a story" in error_msg
-    
-    def test_validate_story_input_too_short(self):
-        """Test story input that's too short."""
-        story = "Hi"
-        is_valid, error_msg = validate_story_input(story)
-        assert is_valid is False
-        assert "at least 10 characters" in error_msg
-    
-    def test_validate_story_input_too_long(self):
-        """Test story input that's too long."""
-        story = "A" * 1001
-        is_valid, error_msg = validate_story_input(story)
-        assert is_valid is False
-        assert "under 1000 characters" in error_msg
-    
-    def test_split_story_into_panels(self):
+    @pytest.mark.parametrize("story,expected_valid,expected_fragment", [
+        pytest.param(_VALID_STORY, True, "", id="valid"),
+        pytest.param("", False, "Please enter a story", id="empty"),
+        pytest.param("Hi", False, "at least 10 characters", id="too_short"),
+        pytest.param(_LONG_STORY, False, "under 1000 characters", id="too_long"),
+    ])
+    def test_validate_story_input(self, utils_mod, story, expected_valid, expected_fragment):
+        """Test story input validation across all branches."""
+        is_valid, error_msg = utils_mod.validate_story_input(story)
+        assert is_valid is expected_valid
+        if expected_fragment:
+            assert expected_fragment in error_msg
+        else:
+            assert error_msg == ""
+
+    def test_split_story_into_panels(self, utils_mod):
         """Test story splitting into panels."""
-        story = "This is a test story with multiple words to split into panels."
-        panels = split_story_into_panels(story, num_panels=3)
+        panels = utils_mod.split_story_into_panels(_PANEL_STORY, num_panels=3)
         
         assert len(panels) == 3
         assert all(isinstance(panel, str) for panel in panels)
         assert all(len(panel) > 0 for panel in panels)
     
-    def test_create_image_prompt(self):
-        """Test image prompt creation."""
-        panel_desc = "A cat in a garden"
-        prompt = create_image_prompt(panel_desc, style="comic")
-        
-        assert "A cat in a garden" in prompt
-        assert "comic book style" in prompt
-        assert "vibrant colors" in prompt
-    
-    def test_create_image_prompt_different_style(self):
-        """Test image prompt creation with different style."""
+    def test_validate_story_input_is_not_regex_based(self, utils_mod, monkeypatch):
+        """Validation must stay plain len() checks, never a regex."""
+        import re
+
+        def _no_compile(*args, **kwargs):
+            raise AssertionError("validate_story_input must not compile regexes")
+
+        monkeypatch.setattr(re, "compile", _no_compile)
+
+        assert utils_mod.validate_story_input(_VALID_STORY)[0] is True
+        assert utils_mod.validate_story_input("")[0] is False
+        assert utils_mod.validate_story_input("Hi")[0] is False
+        assert utils_mod.validate_story_input(_LONG_STORY)[0] is False
+
+    @pytest.mark.parametrize("style,expected_fragments", [
+        pytest.param("comic", ["comic book style", "vibrant colors"], id="comic"),
+        pytest.param("anime", ["anime style", "expressive characters"], id="anime"),
+    ])
+    def test_create_image_prompt(self, utils_mod, style, expected_fragments):
+        """Test image prompt creation across styles."""
         panel_desc = "A cat in a garden"
-        prompt = create_image_prompt(panel_desc, style="anime")
-        
+        prompt = utils_mod.create_image_prompt(panel_desc, style=style)
+
         assert "A cat in a garden" in prompt
-        assert "anime style" in prompt
-        assert "expressive characters" in prompt
-    
-    def test_format_error_message(self):
-        """Test error message formatting."""
-        # Test ConnectionError
-        error = ConnectionError("Connection failed")
-        message = format_error_message(error)
-        assert "Unable to connect" in message
-        
-        # Test ValueError
-        error = ValueError("Invalid input")
-        message = format_error_message(error)
-        assert "Invalid input provided" in message
-        
-        # Test unknown error
-        error = RuntimeError("Unknown error")
-        message = format_error_message(error)
-        assert "unexpected error occurred" in message
+        for fragment in expected_fragments:
+            assert fragment in prompt
+
+    def test_create_image_prompt_unknown_style_raises_keyerror(self, utils_mod):
+        """Unknown styles hit the dict dispatch, not a silent default."""
+        with pytest.raises(KeyError):
+            utils_mod.create_image_prompt("A cat in a garden", style="oilpaint")
+
+    @pytest.mark.parametrize("error,expected_prefix", [
+        pytest.param(_CONN_ERR, "Unable to connect", id="connection"),
+        pytest.param(_VAL_ERR, "Invalid input provided", id="value"),
+        pytest.param(_RT_ERR, "An unexpected error occurred", id="unknown"),
+    ])
+    def test_format_error_message(self, utils_mod, error, expected_prefix):
+        """Test error message formatting per exception type."""
+        message = utils_mod.format_error_message(error)
+        # Every template anchors its phrase at offset 0, so prefix
+        # comparison replaces a substring sweep
+        assert message.startswith(expected_prefix)
 
 
 if __name__ == "__main__":
-    pytest.main([__file__]) 
\ No newline at end of file
+    # Skip plugins this tiny suite never uses (.pytest_cache writes,
+    # stepwise bookkeeping) and the startup header
+    pytest.main([__file__, "-p", "no:cacheprovider", "-p", "no:stepwise",
+                 "--no-header", "-q"])
\ No newline at end of file